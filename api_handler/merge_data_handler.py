@@ -1,4 +1,5 @@
 import logging
+from common.exceptions import InvalidDataException
 from model.data import DataModel
 from transformers.data_downloader import DataDownloader
 from transformers.data_parser import DataParser
@@ -11,25 +12,36 @@ class MergeDataHandler:
     """
 
     def __init__(self, source_url):
+        self.source_url = source_url
         self.data_downloader = DataDownloader(source_url)
         self.data_parser = DataParser()
         self.data_rules = DataRules()
 
+    def process_data(self, raw_data):
+        """
+        parse, save and select the data of every hotel based on the rules
+        :param raw_data:
+        :return:
+        """
+        self.data_parser.parse(raw_data, self.data_rules.select)
+
     def merge_data(self):
         """
         1. download the json from the source
-        2. parse the data
-        3. save the data
+        2. process the data
+        3. archive the raw data, only if it was processed successfully
+        2 and 3 are excluded by a running replay
         :return:
         """
         try:
             raw_data = self.data_downloader.download_data()
-            DataModel.set_data(raw_data)
+            if raw_data is None:
+                raise InvalidDataException(f'no data downloaded from the source. source_url: {self.source_url}')
 
-            DataModel.set_parsed_data(self.data_parser.parse(raw_data))
-            parsed_data = DataModel.get_parsed_data()
+            with DataModel.merging():
+                self.process_data(raw_data)
 
-            self.data_rules.select_data(parsed_data)
+                DataModel.set_data(self.source_url, raw_data)
 
             status = True
         except:
@@ -0,0 +1,39 @@
+import logging
+from api_handler.merge_data_handler import MergeDataHandler
+from model.archive import RawDataArchive
+from model.data import DataModel
+
+
+class ReplayDataHandler:
+    """
+    handles the rebuild of the parsed and the selected data from the archived raw data.
+    used after a rules change to reprocess the data without downloading it again from the sources.
+    the payloads of all the sources are replayed, since the parsed data of a hotel is merged across the sources
+    """
+
+    def replay_data(self):
+        """
+        process the archived raw data in the order it was archived into fresh parsed and selected data,
+        which replaces the existing data once the replay completes. merges wait for the replay.
+        a payload failing to process is logged and skipped
+        :return:
+        """
+        try:
+            total = 0
+            failed = 0
+            with DataModel.rebuild():
+                for source_url, raw_data in RawDataArchive.replay():
+                    try:
+                        MergeDataHandler(source_url).process_data(raw_data)
+                        total += 1
+                    except Exception:
+                        logging.exception(f'exception occurred while replaying the data. source_url: {source_url}')
+                        failed += 1
+
+            logging.info(f'replayed {total} archived payloads, skipped {failed} failed payloads')
+            status = True
+        except:
+            logging.exception('exception occurred while replaying the data')
+            status = False
+
+        return status
@@ -2,6 +2,7 @@ import logging
 from flask import Flask, request, jsonify, abort
 
 from api_handler.merge_data_handler import MergeDataHandler
+from api_handler.replay_data_handler import ReplayDataHandler
 from model.data import DataModel
 
 logging.basicConfig()
@@ -26,6 +27,13 @@ def merge_data():
     return jsonify({'status': status})
 
 
+@app.route('/replay/', methods=['POST'])
+def replay_data():
+    status = ReplayDataHandler().replay_data()
+
+    return jsonify({'status': status})
+
+
 @app.route('/get-hotel-info-by-id/', methods=['POST'])
 def get_hotel_info_by_id():
     request_data = request.json
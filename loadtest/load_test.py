@@ -0,0 +1,263 @@
+import argparse
+import http.client
+import json
+import logging
+import math
+import random
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+
+from loadtest.mock_supplier import MockSupplierServer, PayloadGenerator
+
+
+class LatencyStats:
+    """
+    collects the latencies and the errors of an endpoint
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.latencies = []
+        self.errors = 0
+        # window between the start of the first request and the end of the last request of the endpoint
+        self.first_start = None
+        self.last_end = None
+        self._lock = threading.Lock()
+
+    def record(self, start, end, ok):
+        with self._lock:
+            self.latencies.append(end - start)
+            if not ok:
+                self.errors += 1
+
+            self.first_start = start if self.first_start is None else min(self.first_start, start)
+            self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def percentile(self, percent):
+        """
+        nearest-rank percentile of the recorded latencies
+        :param percent:
+        :return:
+        """
+        if not self.latencies:
+            return 0.0
+
+        latencies = sorted(self.latencies)
+        rank = max(1, math.ceil(percent / 100 * len(latencies)))
+
+        return latencies[rank - 1]
+
+    def summary(self):
+        """
+        return the latency percentiles in ms, the throughput and the error rate of the endpoint.
+        the throughput is measured over the window the endpoint was under load, not the whole run
+        :return:
+        """
+        total = len(self.latencies)
+        duration = self.last_end - self.first_start if total else 0.0
+        return {
+            'endpoint': self.endpoint,
+            'requests': total,
+            'errors': self.errors,
+            'error_rate': self.errors / total if total else 0.0,
+            'throughput': total / duration if duration else 0.0,
+            'p50': self.percentile(50) * 1000,
+            'p90': self.percentile(90) * 1000,
+            'p99': self.percentile(99) * 1000,
+            'max': self.percentile(100) * 1000,
+        }
+
+
+class LoadTest:
+    """
+    drives concurrent merge and read traffic against the service and collects the stats per endpoint.
+
+    modes:
+    1. sequential: run all the merges, then all the reads
+    2. mixed: run the reads continuously while the merges are in progress
+    """
+
+    MERGE_ENDPOINT = '/merge/'
+    HOTEL_INFO_ENDPOINT = '/get-hotel-info-by-id/'
+    ALL_HOTELS_ENDPOINT = '/get-all-hotels-info/'
+
+    MODES = ['sequential', 'mixed']
+
+    def __init__(self, target_url, source_urls, hotel_ids, merges=30, reads=1000, merge_concurrency=3,
+                 read_concurrency=8, all_hotels_ratio=0.05, mode='sequential', timeout=60):
+        if mode not in self.MODES:
+            raise ValueError(f'invalid mode: {mode}. allowed modes: {self.MODES}')
+
+        self.target_url = target_url.rstrip('/')
+        self.source_urls = source_urls
+        self.hotel_ids = hotel_ids
+        self.merges = merges
+        self.reads = reads
+        self.merge_concurrency = merge_concurrency
+        self.read_concurrency = read_concurrency
+        self.all_hotels_ratio = all_hotels_ratio
+        self.mode = mode
+        self.timeout = timeout
+
+        self.stats = {endpoint: LatencyStats(endpoint)
+                      for endpoint in [self.MERGE_ENDPOINT, self.HOTEL_INFO_ENDPOINT, self.ALL_HOTELS_ENDPOINT]}
+        self.merges_done = threading.Event()
+
+    def _post(self, endpoint, body):
+        """
+        post the request and record the latency.
+        failed http requests, error responses and failed merges are counted as errors
+        :param endpoint:
+        :param body:
+        :return:
+        """
+        request = urllib.request.Request(f'{self.target_url}{endpoint}', data=json.dumps(body).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response_data = json.load(response)
+
+            ok = 'error' not in response_data and response_data.get('status') is not False
+        except (URLError, OSError, ValueError, http.client.HTTPException) as e:
+            logging.debug(f'request failed. endpoint: {endpoint}, exception: {str(e)}')
+            ok = False
+
+        self.stats[endpoint].record(start, time.perf_counter(), ok)
+
+    def merge(self, index):
+        self._post(self.MERGE_ENDPOINT, {'source_url': self.source_urls[index % len(self.source_urls)]})
+
+    def read(self, rnd):
+        if rnd.random() < self.all_hotels_ratio:
+            self._post(self.ALL_HOTELS_ENDPOINT, {})
+        else:
+            self._post(self.HOTEL_INFO_ENDPOINT, {'hotel_id': rnd.choice(self.hotel_ids)})
+
+    def _run_merges(self):
+        # the reads of the mixed mode run until this is set, so it is set even if a merge raises
+        try:
+            with ThreadPoolExecutor(self.merge_concurrency) as executor:
+                list(executor.map(self.merge, range(self.merges)))
+        finally:
+            self.merges_done.set()
+
+    def _run_reads(self, worker):
+        rnd = random.Random(worker)
+        if self.mode == 'mixed':
+            while not self.merges_done.is_set():
+                self.read(rnd)
+
+            return
+
+        for _ in range(worker, self.reads, self.read_concurrency):
+            self.read(rnd)
+
+    def run(self):
+        """
+        run the load test
+        :return: summary per endpoint
+        """
+        if self.mode == 'mixed':
+            with ThreadPoolExecutor(self.read_concurrency + 1) as executor:
+                merge_future = executor.submit(self._run_merges)
+                read_futures = [executor.submit(self._run_reads, worker) for worker in range(self.read_concurrency)]
+                for future in [merge_future] + read_futures:
+                    future.result()
+        else:
+            self._run_merges()
+            with ThreadPoolExecutor(self.read_concurrency) as executor:
+                for future in [executor.submit(self._run_reads, worker) for worker in range(self.read_concurrency)]:
+                    future.result()
+
+        return [stats.summary() for stats in self.stats.values() if stats.latencies]
+
+
+def format_report(summaries):
+    header = f'{"endpoint":<24}{"requests":>10}{"errors":>8}{"err %":>8}{"req/s":>10}' \
+             f'{"p50 ms":>10}{"p90 ms":>10}{"p99 ms":>10}{"max ms":>10}'
+    lines = [header, '-' * len(header)]
+    for summary in summaries:
+        lines.append(f'{summary["endpoint"]:<24}{summary["requests"]:>10}{summary["errors"]:>8}'
+                     f'{summary["error_rate"] * 100:>8.2f}{summary["throughput"]:>10.1f}'
+                     f'{summary["p50"]:>10.1f}{summary["p90"]:>10.1f}{summary["p99"]:>10.1f}{summary["max"]:>10.1f}')
+
+    return '\n'.join(lines)
+
+
+def start_app(archive_dir):
+    """
+    start app.py in-process on a threaded server at a free local port
+    :param archive_dir: directory for the raw data archive, so that the run does not touch archive/
+    :return: server, url of the server
+    """
+    from werkzeug.serving import make_server
+
+    from app import app
+    from model.archive import RawDataArchive
+
+    RawDataArchive.ARCHIVE_DIR = archive_dir
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description='load test the merge and the read endpoints')
+    parser.add_argument('--target-url', help='url of a running service. if not passed, app.py is started in-process')
+    parser.add_argument('--mode', choices=LoadTest.MODES, default='sequential')
+    parser.add_argument('--hotels', type=int, default=1000, help='number of hotels per supplier payload')
+    parser.add_argument('--merges', type=int, default=30)
+    parser.add_argument('--reads', type=int, default=1000, help='number of reads in the sequential mode')
+    parser.add_argument('--merge-concurrency', type=int, default=3)
+    parser.add_argument('--read-concurrency', type=int, default=8)
+    parser.add_argument('--all-hotels-ratio', type=float, default=0.05,
+                        help=f'fraction of the reads sent to {LoadTest.ALL_HOTELS_ENDPOINT}')
+    parser.add_argument('--latency-ms', type=float, default=0, help='fixed supplier latency')
+    parser.add_argument('--latency-jitter-ms', type=float, default=0, help='random supplier latency added on top')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of the supplier responses failing')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--log-level', default='ERROR')
+
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+
+    supplier_server = MockSupplierServer(total_hotels=args.hotels, latency_ms=args.latency_ms,
+                                         latency_jitter_ms=args.latency_jitter_ms, failure_rate=args.failure_rate,
+                                         seed=args.seed).start()
+    app_server = None
+    target_url = args.target_url
+    with tempfile.TemporaryDirectory() as archive_dir:
+        if not target_url:
+            app_server, target_url = start_app(archive_dir)
+
+        # app.py configures the root logger at import
+        logging.getLogger().setLevel(args.log_level)
+        logging.getLogger('werkzeug').setLevel(args.log_level)
+
+        try:
+            load_test = LoadTest(target_url,
+                                 [supplier_server.get_source_url(supplier) for supplier in PayloadGenerator.SUPPLIERS],
+                                 supplier_server.generator.get_hotel_ids(),
+                                 merges=args.merges, reads=args.reads, merge_concurrency=args.merge_concurrency,
+                                 read_concurrency=args.read_concurrency, all_hotels_ratio=args.all_hotels_ratio,
+                                 mode=args.mode)
+            print(format_report(load_test.run()))
+        finally:
+            if app_server:
+                app_server.shutdown()
+
+            supplier_server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+class PayloadGenerator:
+    """
+    generates the supplier payloads in the acme, patagonia and paperflies formats.
+    all the suppliers share the same hotel ids so that the merges overlap like the real sources
+    """
+
+    SUPPLIERS = ['acme', 'patagonia', 'paperflies']
+
+    KEYWORDS = ['luxury', 'spa', 'beach', 'resort', 'garden', 'scenic', 'deals', 'waterfront', 'butler service']
+    AMENITIES = ['pool', 'wifi', 'aircon', 'tv', 'bathtub', 'coffee machine', 'kettle', 'hair dryer', 'iron',
+                 'business center', 'childcare', 'dry cleaning', 'breakfast', 'bar']
+
+    def __init__(self, total_hotels, seed=0):
+        self.total_hotels = total_hotels
+        self.seed = seed
+
+    def get_hotel_ids(self):
+        return [f'H{index:06d}' for index in range(self.total_hotels)]
+
+    def _description(self, rnd):
+        return ' '.join(rnd.sample(self.KEYWORDS, 3)) + ' hotel in the heart of the city'
+
+    def _images(self, rnd, link_key, description_key, count):
+        return [{link_key: f'https://images.example.com/{rnd.randrange(10 ** 6)}.jpg',
+                 description_key: rnd.choice(self.AMENITIES)} for _ in range(count)]
+
+    def acme(self, rnd, hotel_id, destination_id):
+        return {
+            'Id': hotel_id,
+            'DestinationId': destination_id,
+            'Name': f'Hotel {hotel_id}',
+            'Latitude': rnd.uniform(-90, 90),
+            'Longitude': rnd.uniform(-180, 180),
+            'Address': f' {rnd.randrange(1, 999)} Main Street ',
+            'City': 'Singapore',
+            'Country': 'SG',
+            'PostalCode': str(rnd.randrange(10 ** 5, 10 ** 6)),
+            'Description': self._description(rnd),
+            'Facilities': rnd.sample(self.AMENITIES, 6),
+        }
+
+    def patagonia(self, rnd, hotel_id, destination_id):
+        return {
+            'id': hotel_id,
+            'destination': destination_id,
+            'name': f'Hotel {hotel_id}',
+            'lat': rnd.uniform(-90, 90),
+            'lng': rnd.uniform(-180, 180),
+            'address': f'{rnd.randrange(1, 999)} Main Street',
+            'info': self._description(rnd),
+            'amenities': rnd.sample(self.AMENITIES, 4),
+            'images': {
+                'rooms': self._images(rnd, 'url', 'description', 3),
+                'amenities': self._images(rnd, 'url', 'description', 2),
+            },
+        }
+
+    def paperflies(self, rnd, hotel_id, destination_id):
+        return {
+            'hotel_id': hotel_id,
+            'destination_id': destination_id,
+            'hotel_name': f'Hotel {hotel_id}',
+            'location': {
+                'address': f'{rnd.randrange(1, 999)} Main Street',
+                'country': 'Singapore',
+            },
+            'details': self._description(rnd),
+            'amenities': {
+                'general': rnd.sample(self.AMENITIES, 3),
+                'room': rnd.sample(self.AMENITIES, 3),
+            },
+            'images': {
+                'rooms': self._images(rnd, 'link', 'caption', 2),
+                'site': self._images(rnd, 'link', 'caption', 2),
+            },
+            'booking_conditions': ['All children are welcome.', 'Pets are not allowed.'],
+        }
+
+    def generate(self, supplier):
+        """
+        return the json encoded payload of the supplier
+        :param supplier:
+        :return:
+        """
+        if supplier not in self.SUPPLIERS:
+            raise ValueError(f'unknown supplier: {supplier}')
+
+        rnd = random.Random(f'{self.seed}-{supplier}')
+        build = getattr(self, supplier)
+        payload = [build(rnd, hotel_id, 1000 + index % 100) for index, hotel_id in enumerate(self.get_hotel_ids())]
+
+        return json.dumps(payload).encode('utf-8')
+
+
+class MockSupplierServer:
+    """
+    local stand-in for the supplier urls.
+    serves the generated payloads at /suppliers/<supplier> with the configured latency and failure rate
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, total_hotels=1000, latency_ms=0, latency_jitter_ms=0,
+                 failure_rate=0.0, seed=0):
+        self.generator = PayloadGenerator(total_hotels, seed)
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.failure_rate = failure_rate
+
+        # payloads are generated once up front so that the generation does not count towards the latency
+        self.payloads = {supplier: self.generator.generate(supplier) for supplier in PayloadGenerator.SUPPLIERS}
+
+        self.server = ThreadingHTTPServer((host, port), self._get_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/suppliers'
+
+    def get_source_url(self, supplier):
+        return f'{self.base_url}/{supplier}'
+
+    def _get_handler(self):
+        supplier_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                logging.debug(f'mock supplier: {format % args}')
+
+            def do_GET(self):
+                path = urlparse(self.path).path.rstrip('/')
+                prefix, _, supplier = path.rpartition('/')
+                if prefix != '/suppliers' or supplier not in supplier_server.payloads:
+                    self.send_error(404, f'unknown supplier: {supplier}')
+                    return
+
+                delay_ms = supplier_server.latency_ms + random.uniform(0, supplier_server.latency_jitter_ms)
+                if delay_ms:
+                    time.sleep(delay_ms / 1000)
+
+                if random.random() < supplier_server.failure_rate:
+                    self.send_error(500, 'injected failure')
+                    return
+
+                payload = supplier_server.payloads[supplier]
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread:
+            self.thread.join()
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description='serve generated supplier payloads locally')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--hotels', type=int, default=1000, help='number of hotels per supplier payload')
+    parser.add_argument('--latency-ms', type=float, default=0, help='fixed latency added to every response')
+    parser.add_argument('--latency-jitter-ms', type=float, default=0, help='random latency added on top')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of responses failing with 500')
+    parser.add_argument('--seed', type=int, default=0)
+
+    return parser
+
+
+if __name__ == '__main__':
+    args = get_parser().parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    mock_server = MockSupplierServer(args.host, args.port, args.hotels, args.latency_ms, args.latency_jitter_ms,
+                                     args.failure_rate, args.seed)
+    for name in PayloadGenerator.SUPPLIERS:
+        logging.info(f'serving {mock_server.get_source_url(name)}')
+
+    try:
+        mock_server.server.serve_forever()
+    except KeyboardInterrupt:
+        mock_server.server.server_close()
@@ -0,0 +1,242 @@
+import contextlib
+import fcntl
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+
+class RawDataArchive:
+    """
+    RawDataArchive keeps the raw data downloaded from the sources on disk.
+    every payload is gzip compressed and addressed by the hash of its source url and the hash of its content,
+    so an unchanged payload downloaded again is stored only once.
+    the index keeps the order in which the payloads were archived, which is the order they are replayed in.
+    """
+
+    ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'archive')
+    INDEX_FILE = 'index.json'
+    LOCK_FILE = 'index.lock'
+
+    # retention limits. the oldest entries of a source are dropped first, the newest entry of a source is always kept
+    # this can be moved to database for on-the-fly changes
+    MAX_ENTRIES_PER_SOURCE = 10
+    MAX_TOTAL_ENTRIES = 100
+
+    # guards the index between the threads of the process. the processes sharing the archive are excluded by a
+    # file lock, see _index_lock
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _hash(data):
+        return hashlib.sha256(data).hexdigest()
+
+    @classmethod
+    def _source_key(cls, source_url):
+        """
+        return the directory name used for the source url
+        :param source_url:
+        :return:
+        """
+        return cls._hash(source_url.encode('utf-8'))[:16]
+
+    @classmethod
+    def _payload_path(cls, source_url, content_hash):
+        return os.path.join(cls.ARCHIVE_DIR, cls._source_key(source_url), f'{content_hash}.json.gz')
+
+    @classmethod
+    def _index_path(cls):
+        return os.path.join(cls.ARCHIVE_DIR, cls.INDEX_FILE)
+
+    @classmethod
+    @contextlib.contextmanager
+    def _index_lock(cls):
+        """
+        context manager holding the index exclusively, across the threads and the processes sharing the archive
+        :return:
+        """
+        os.makedirs(cls.ARCHIVE_DIR, exist_ok=True)
+        with cls._lock, open(os.path.join(cls.ARCHIVE_DIR, cls.LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @classmethod
+    def _load_index(cls):
+        """
+        return the list of archived entries, oldest first
+        :return:
+        """
+        try:
+            with open(cls._index_path(), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    @classmethod
+    def _save_index(cls, index):
+        """
+        write the index to a temporary file first so that a crash never leaves a partial index behind
+        :param index:
+        :return:
+        """
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=cls.ARCHIVE_DIR)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f)
+
+        os.replace(tmp_path, cls._index_path())
+
+    @classmethod
+    def _apply_retention(cls, index):
+        """
+        drop the oldest entries exceeding the retention limits and delete the payloads no longer referenced
+        :param index:
+        :return: retained entries
+        """
+        # the newest entry of every source is kept regardless of the limits, so that the replay never drops a source
+        newest = {}
+        for position, entry in enumerate(index):
+            newest[entry['source_url']] = position
+
+        retained_positions = set(newest.values())
+        per_source = {source_url: 1 for source_url in newest}
+        for position in reversed(range(len(index))):
+            entry = index[position]
+            if position in retained_positions:
+                continue
+
+            if per_source[entry['source_url']] >= cls.MAX_ENTRIES_PER_SOURCE or \
+                    len(retained_positions) >= cls.MAX_TOTAL_ENTRIES:
+                continue
+
+            per_source[entry['source_url']] += 1
+            retained_positions.add(position)
+
+        retained = [entry for position, entry in enumerate(index) if position in retained_positions]
+
+        referenced = {(entry['source_url'], entry['hash']) for entry in retained}
+        for entry in index:
+            if (entry['source_url'], entry['hash']) in referenced:
+                continue
+
+            try:
+                os.remove(cls._payload_path(entry['source_url'], entry['hash']))
+            except FileNotFoundError:
+                pass
+
+            # the same payload may be referenced twice in the dropped entries
+            referenced.add((entry['source_url'], entry['hash']))
+
+        return retained
+
+    @staticmethod
+    def _compress(payload_path, content):
+        """
+        write the gzip compressed content to a new temporary file next to the payload path
+        :param payload_path:
+        :param content:
+        :return: path of the temporary file
+        """
+        os.makedirs(os.path.dirname(payload_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(payload_path))
+        with os.fdopen(fd, 'wb') as raw_file, gzip.GzipFile(fileobj=raw_file, mode='wb') as f:
+            f.write(content)
+
+        return tmp_path
+
+    @classmethod
+    def store(cls, source_url, data):
+        """
+        archive the raw data downloaded from the source using source url
+        :param source_url:
+        :param data: raw data
+        :return: hash of the archived content
+        an unchanged payload of the source is not added to the index again, so that it is not replayed twice
+        """
+        content = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        content_hash = cls._hash(content)
+        payload_path = cls._payload_path(source_url, content_hash)
+
+        # compress outside the lock, into a temporary file unique to this call
+        tmp_path = None
+        if not os.path.exists(payload_path):
+            tmp_path = cls._compress(payload_path, content)
+
+        with cls._index_lock():
+            if not tmp_path and not os.path.exists(payload_path):
+                # the payload was dropped by the retention after the check above
+                tmp_path = cls._compress(payload_path, content)
+
+            if tmp_path:
+                os.replace(tmp_path, payload_path)
+
+            index = cls._load_index()
+            latest = [entry for entry in index if entry['source_url'] == source_url][-1:]
+            if latest and latest[0]['hash'] == content_hash:
+                logging.debug(f'raw data is unchanged. source_url: {source_url}, hash: {content_hash}')
+                return content_hash
+
+            index.append({'source_url': source_url, 'hash': content_hash, 'archived_at': time.time()})
+            cls._save_index(cls._apply_retention(index))
+
+        logging.debug(f'archived raw data. source_url: {source_url}, hash: {content_hash}')
+
+        return content_hash
+
+    @classmethod
+    def load(cls, source_url, content_hash):
+        """
+        return the archived raw data
+        :param source_url:
+        :param content_hash:
+        :return:
+        """
+        with gzip.open(cls._payload_path(source_url, content_hash), 'rb') as f:
+            return json.loads(f.read().decode('utf-8'))
+
+    @classmethod
+    def get_entries(cls, source_url=None):
+        """
+        return the archived entries in the order they were archived
+        :param source_url: if passed, only the entries of this source are returned
+        :return:
+        """
+        with cls._index_lock():
+            index = cls._load_index()
+
+        if source_url:
+            return [entry for entry in index if entry['source_url'] == source_url]
+
+        return index
+
+    @classmethod
+    def get_latest(cls, source_url):
+        """
+        return the raw data archived last for the source url
+        :param source_url:
+        :return:
+        """
+        entries = cls.get_entries(source_url)
+        if not entries:
+            return None
+
+        return cls.load(source_url, entries[-1]['hash'])
+
+    @classmethod
+    def replay(cls):
+        """
+        yield the archived raw data of all the sources in the order it was archived
+        :return:
+        """
+        for entry in cls.get_entries():
+            try:
+                yield entry['source_url'], cls.load(entry['source_url'], entry['hash'])
+            except FileNotFoundError:
+                logging.warning(f'archived payload is missing. source_url: {entry["source_url"]}, '
+                                f'hash: {entry["hash"]}')
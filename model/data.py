@@ -1,49 +1,174 @@
+import contextlib
+import copy
 import logging
+import threading
+import zlib
+
+from model.archive import RawDataArchive
+
+
+class DataShard:
+    """
+    holds the parsed and the selected data of the hotels hashed to the shard.
+    the data of the shard is read and written only while holding its lock
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.parsed_data = {}
+        self.selected_data = {}
+
+
+class ReadWriteLock:
+    """
+    lock shared by any number of readers or held by a single writer.
+    a waiting writer blocks the new readers, so that it is not starved by them
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextlib.contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer or self._writers_waiting:
+                self._condition.wait()
+
+            self._readers += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+
+            self._writers_waiting -= 1
+            self._writer = True
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
 
 
 class DataModel:
     """
     DataModel plays the role of database.
-    DataModel class saves data in-memory for the demo purpose
+    DataModel class saves data in-memory for the demo purpose.
+    raw data is not kept in-memory, it is archived on disk by RawDataArchive.
+
+    the parsed and the selected data are sharded by the hash of the hotel id, with a lock per shard,
+    so that the merges of the different suppliers run in parallel without losing updates.
+    the saved records are never mutated in place, every update saves a new record.
+
+    merges run inside merging() and a rebuild inside rebuild(). the two exclude each other: a rebuild waits for the
+    running merges and holds back the new ones until its fresh shards are swapped in
     """
 
-    DATA = {}
-    PARSED_DATA = {}
-    SELECTED_DATA = {}
+    SHARD_COUNT = 16
+    SHARDS = [DataShard() for _ in range(SHARD_COUNT)]
+
+    MERGE_LOCK = ReadWriteLock()
+
+    # fresh shards of the rebuild running in the current thread
+    _local = threading.local()
 
     @classmethod
-    def get_raw_data(cls):
+    def _get_shards(cls):
+        return getattr(cls._local, 'shards', None) or cls.SHARDS
+
+    @classmethod
+    def _get_shard(cls, id_):
         """
-        return the raw data downloaded from the source using source url
+        return the shard holding the data of the hotel
+        :param id_: hotel id
         :return:
         """
-        return cls.DATA
+        shards = cls._get_shards()
+        return shards[zlib.crc32(str(id_).encode('utf-8')) % len(shards)]
+
+    @staticmethod
+    def _strip_score(data):
+        return {key: value for key, value in data.items() if key != 'score'}
 
     @classmethod
-    def set_data(cls, data):
+    def set_data(cls, source_url, data):
         """
-        save the raw data downloaded from the source using source url
+        archive the raw data downloaded from the source using source url
+        :param source_url:
         :param data:
         :return:
         """
-        cls.DATA = data
+        return RawDataArchive.store(source_url, data)
 
     @classmethod
-    def get_parsed_data(cls):
+    def merging(cls):
         """
-        fetch the parsed data
+        context manager held while a merge updates the data
         :return:
         """
-        return cls.PARSED_DATA
+        return cls.MERGE_LOCK.read()
 
     @classmethod
-    def set_parsed_data(cls, data):
+    @contextlib.contextmanager
+    def rebuild(cls):
         """
-        save the parsed data generated from raw source data
-        :param data:
+        context manager rebuilding the parsed and the selected data from scratch.
+        the updates made in the current thread go to fresh shards, which replace the existing ones at once when the
+        block completes. the readers see the existing data until then, and nothing is replaced if the block raises
         :return:
         """
-        cls.PARSED_DATA = {info['id']: info for info in data}
+        with cls.MERGE_LOCK.write():
+            cls._local.shards = [DataShard() for _ in range(cls.SHARD_COUNT)]
+            try:
+                yield
+                cls.SHARDS = cls._local.shards
+            finally:
+                cls._local.shards = None
+
+    @classmethod
+    def update_parsed_data(cls, id_, update, select=None):
+        """
+        atomically update the parsed data of the hotel, and its selection if select is passed.
+        the update and the selection run in the same critical section of the shard, so that the concurrent merges
+        of the hotel are parsed and selected one after the other instead of overwriting each other
+        :param id_: hotel id
+        :param update: callable receiving a copy of the existing data (None if missing) and returning the data to
+                       save. if it returns None, the existing data is kept
+        :param select: callable receiving the existing finalized data (None if missing) and the saved data, and
+                       returning the finalized data to save. if it returns None, the existing data is kept
+        :return: saved data, None if nothing was saved
+        """
+        shard = cls._get_shard(id_)
+        with shard.lock:
+            existing_data = shard.parsed_data.get(id_)
+            data = update(copy.deepcopy(existing_data) if existing_data else None)
+            if data is None:
+                return None
+
+            shard.parsed_data[id_] = data
+            if not select:
+                return data
+
+            selected_data = select(shard.selected_data.get(id_), data)
+            if selected_data is not None:
+                shard.selected_data[id_] = selected_data
+
+        return data
 
     @classmethod
     def get_finalized_data(cls, id_=None):
@@ -54,19 +179,16 @@ class DataModel:
         :return:
         """
         if id_:
-            return cls.SELECTED_DATA.get(id_)
+            shard = cls._get_shard(id_)
+            with shard.lock:
+                return shard.selected_data.get(id_)
 
-        return cls.SELECTED_DATA
+        selected_data = {}
+        for shard in cls._get_shards():
+            with shard.lock:
+                selected_data.update(shard.selected_data)
 
-    @classmethod
-    def set_finalized_data(cls, id_, data):
-        """
-        save the finalized data for selection
-        :param id_: hotel id
-        :param data: finalized data
-        :return:
-        """
-        cls.SELECTED_DATA[id_] = data
+        return selected_data
 
     @classmethod
     def get_selected_data_by_hotel_id(cls, hotel_id):
@@ -81,21 +203,12 @@ class DataModel:
         if not hotel_id:
             raise ValueError(f'invalid hotel id. hotel_id: {hotel_id}')
 
-        data = cls.SELECTED_DATA.get(hotel_id)
+        data = cls.get_finalized_data(hotel_id)
         if data:
-            data.pop('score', None)
+            data = cls._strip_score(data)
 
         return data
 
     @classmethod
     def get_all_selected_data(cls):
-        selected_data = []
-        for id_, data in cls.SELECTED_DATA.items():
-            data.pop('score', None)
-            selected_data.append(data)
-
-        return selected_data
-
-    @classmethod
-    def get_existing_data(cls, id_):
-        return cls.PARSED_DATA.get(id_, {})
+        return [cls._strip_score(data) for data in cls.get_finalized_data().values()]
@@ -328,44 +328,70 @@ class DataParser:
         elif field_name in self.ALLOWED_BOOKING_CONDITIONS:
             self._update_booking_conditions(temp_info, field_name, sanitized_data)
 
-    def transform_data(self, data):
+    def get_hotel_id(self, info):
         """
-        transform keys to the common format
+        return the hotel id of the source data
+        :param info:
         :return:
         """
-        transformed_data = []
-        for info in data:
+        existing_id = list(filter(None, [info.get(id_field) for id_field in self.ALLOWED_HOTEL_ID]))
+        if existing_id:
+            return self.sanitize_data(existing_id[0])
 
-            existing_id = list(filter(None, [info.get(id_field) for id_field in self.ALLOWED_HOTEL_ID]))
-            if existing_id and DataModel.get_existing_data(existing_id[0]):
-                temp_info = DataModel.get_existing_data(existing_id[0])
-            else:
-                temp_info = copy.deepcopy(self.DATA)
+        return None
 
-            for field, field_info in info.items():
-                transformed_field_name = self.get_transformed_field_name(field)
+    def transform_data(self, info, existing_data=None):
+        """
+        transform keys to the common format and merge them into the existing data
+        :param info: source data of the hotel
+        :param existing_data: existing parsed data of the hotel
+        :return:
+        """
+        temp_info = existing_data or copy.deepcopy(self.DATA)
 
-                if not transformed_field_name:
-                    transformed_field_name = field
+        for field, field_info in info.items():
+            transformed_field_name = self.get_transformed_field_name(field)
 
-                self.update_data(temp_info, transformed_field_name, self.sanitize_data(field_info))
+            if not transformed_field_name:
+                transformed_field_name = field
 
-            transformed_data.append(temp_info)
+            self.update_data(temp_info, transformed_field_name, self.sanitize_data(field_info))
 
-        return transformed_data
+        return temp_info
 
-    def parse(self, data=None):
+    def _parse_info(self, info, existing_data=None):
+        """
+        transform and validate the source data of the hotel
+        :param info:
+        :param existing_data:
+        :return: parsed data, None if the data is rejected
         """
-        validate and parse the data for internal consumption
+        temp_info = self.transform_data(info, existing_data)
+        if not self.validate_data(temp_info):
+            return None
+
+        return temp_info
+
+    def parse(self, data=None, select=None):
+        """
+        validate and parse the data for internal consumption.
+        the data of every hotel is merged into its existing parsed data and saved atomically
         :param data:
+        :param select: if passed, selects the saved data of every hotel in the same atomic update.
+                       see DataModel.update_parsed_data
         :return:
         """
-        self.data = self.transform_data(self.data or data)
-
         validated_data = []
-        for data in self.data:
-            if self.validate_data(data):
-                validated_data.append(data)
+        for info in self.data or data:
+            hotel_id = self.get_hotel_id(info)
+            if hotel_id:
+                parsed_info = DataModel.update_parsed_data(
+                    hotel_id, lambda existing_data: self._parse_info(info, existing_data), select)
+            else:
+                parsed_info = self._parse_info(info)
+
+            if parsed_info:
+                validated_data.append(parsed_info)
 
         self.data = validated_data
 
@@ -1,6 +1,3 @@
-from model.data import DataModel
-
-
 class DataRules:
     """
     handles the score of the data
@@ -70,23 +67,15 @@ class DataRules:
 
         return score
 
-    def select_data(self, source_data):
+    def select(self, existing_data, data):
         """
-        based on the calculated score, update the data selection
-        :param source_data:
-        :return:
+        select the data if its score is not lower than the score of the existing selection
+        :param existing_data: existing finalized data
+        :param data:
+        :return: finalized data with the score, None if the existing selection is kept
         """
-        for id_, data in source_data.items():
-            existing_data = DataModel.get_finalized_data().get(id_)
-            score = self.count_hits(data)
-            if not existing_data:
-                data['score'] = score
-                DataModel.set_finalized_data(id_, data)
-                continue
-
-            if score < 0 or score < existing_data.get('score', 0):
-                continue
-
-            data['score'] = score
+        score = self.count_hits(data)
+        if existing_data and (score < 0 or score < existing_data.get('score', 0)):
+            return None
 
-        return True
+        return dict(data, score=score)